@@ -1,138 +1,594 @@
 ﻿import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
+import hashlib
+import io
 import os
+import re
+
+try:
+    import numexpr as ne
+except ImportError:  # numexpr is optional; filters fall back to plain NumPy
+    ne = None
+
+try:
+    import pulp
+except ImportError:  # pulp is optional; lineups fall back to the greedy fill
+    pulp = None
 
 st.set_page_config(page_title="NBA DFS Optimizer", page_icon="🏀", layout="wide")
 
 # Initialize session state
 if 'slate_data' not in st.session_state:
     st.session_state['slate_data'] = None
+if 'slate_file_id' not in st.session_state:
+    st.session_state['slate_file_id'] = None
+if 'slate_key' not in st.session_state:
+    st.session_state['slate_key'] = None
+if 'slate_rows' not in st.session_state:
+    st.session_state['slate_rows'] = 0
+if 'slate_preview' not in st.session_state:
+    st.session_state['slate_preview'] = None
 if 'player_pool' not in st.session_state:
     st.session_state['player_pool'] = None
+if 'pool_table' not in st.session_state:
+    st.session_state['pool_table'] = None
 if 'core_stacks' not in st.session_state:
     st.session_state['core_stacks'] = []
 if 'lineups' not in st.session_state:
-    st.session_state['lineups'] = []
+    st.session_state['lineups'] = None
+if 'lineups_csv' not in st.session_state:
+    st.session_state['lineups_csv'] = None
+if 'player_page' not in st.session_state:
+    st.session_state['player_page'] = 1
+if 'lineup_page' not in st.session_state:
+    st.session_state['lineup_page'] = 1
+
+LINEUP_SIZE = 9
+
+# Rows rendered per page in the filtered player table and lineup list
+PLAYERS_PER_PAGE = 50
+LINEUPS_PER_PAGE = 20
+
+# Roster slots per position for a 9-player lineup
+ROSTER_SLOTS = {'PG': 2, 'SG': 2, 'SF': 2, 'PF': 2, 'C': 1}
+
+# Column name patterns, checked in order; the first match classifies a column
+COLUMN_PATTERNS = [
+    ('name', re.compile(r'name')),
+    ('position', re.compile(r'^(?!.*opp).*pos')),
+    ('salary', re.compile(r'sal')),
+    ('proj_pts', re.compile(r'proj|fppg')),
+    ('team', re.compile(r'^(?!.*opp).*team')),
+    ('ownership', re.compile(r'own')),
+]
 
 # Helper functions
+def to_arrow_bytes(df):
+    """Serialize a DataFrame to Arrow IPC stream bytes"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def from_arrow_bytes(data):
+    """Deserialize a DataFrame written by to_arrow_bytes"""
+    with pa.ipc.open_stream(data) as reader:
+        return reader.read_pandas()
+
+def slate_size():
+    """Return the number of players in the loaded slate without decoding it"""
+    return st.session_state['slate_rows']
+
+def set_slate(df):
+    """Store the slate in session state as Arrow IPC bytes, which are far
+    cheaper to serialize than a pickled DataFrame with string columns
+    
+    The row count and upload preview are built here too, so reruns that only
+    display the slate never need to decode it.
+    """
+    data = to_arrow_bytes(df)
+    st.session_state['slate_data'] = data
+    st.session_state['slate_key'] = hashlib.md5(data).hexdigest()
+    st.session_state['slate_rows'] = len(df)
+    st.session_state['slate_preview'] = arrow_frame(
+        df.nlargest(15, 'value')[['name', 'position', 'team', 'salary', 'proj_pts', 'value']]
+    )
+
+def map_columns(columns):
+    """Return {field: column} for the CSV columns (last matching column wins)"""
+    cols = pd.Index(columns)
+    lower = cols.astype(str).str.lower()
+    fields = np.select(
+        [lower.str.contains(pattern) for _, pattern in COLUMN_PATTERNS],
+        [field for field, _ in COLUMN_PATTERNS],
+        default=''
+    )
+    return {field: col for col, field in zip(cols, fields.tolist()) if field}
+
 def parse_csv(df):
     """Parse CSV and extract player data"""
-    players = []
+    # Flexible column mapping
+    mapping = map_columns(df.columns)
     
-    for _, row in df.iterrows():
-        player = {}
-        
-        # Flexible column mapping
-        for col in df.columns:
-            col_lower = col.lower()
-            
-            if 'name' in col_lower or col_lower == 'nickname':
-                player['name'] = row[col]
-            elif 'pos' in col_lower and 'opp' not in col_lower:
-                player['position'] = row[col]
-            elif 'sal' in col_lower or col_lower == 'salary':
-                player['salary'] = float(str(row[col]).replace('$', '').replace(',', ''))
-            elif 'proj' in col_lower or 'fppg' in col_lower:
-                player['proj_pts'] = float(row[col])
-            elif 'team' in col_lower and 'opp' not in col_lower:
-                player['team'] = row[col]
-            elif 'own' in col_lower:
-                player['ownership'] = float(row[col])
-        
-        # Calculate value
-        if 'name' in player and player.get('salary', 0) > 0 and player.get('proj_pts', 0) > 0:
-            player['value'] = player['proj_pts'] / (player['salary'] / 1000)
-            players.append(player)
+    if 'name' not in mapping or 'salary' not in mapping or 'proj_pts' not in mapping:
+        return pd.DataFrame()
+    
+    # Build from the source columns directly rather than selecting and renaming
+    out = pd.DataFrame({field: df[col].array for field, col in mapping.items()}, copy=False)
     
-    return pd.DataFrame(players)
+    out['salary'] = pd.to_numeric(
+        out['salary'].astype(str).str.replace(r'[$,]', '', regex=True), errors='coerce'
+    )
+    out['proj_pts'] = pd.to_numeric(out['proj_pts'], errors='coerce')
+    if 'ownership' in out.columns:
+        out['ownership'] = pd.to_numeric(out['ownership'], errors='coerce')
+    
+    out = out[(out['salary'] > 0) & (out['proj_pts'] > 0) & out['name'].notna()]
+    
+    # Calculate value
+    out['value'] = out['proj_pts'] / (out['salary'] / 1000.0)
+    
+    # Salaries are whole dollars, so int32 is exact. Projections and value stay
+    # float64 so the filter thresholds compare exactly. Labels become
+    # categoricals so membership tests and sorts work on integer codes
+    dtypes = {
+        'salary': 'int32', 'ownership': 'float32',
+        'name': 'category', 'position': 'category', 'team': 'category'
+    }
+    out = out.astype({col: dtype for col, dtype in dtypes.items() if col in out.columns})
+    
+    return out.reset_index(drop=True)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_and_parse(file_bytes, file_name=''):
+    """Read and parse an uploaded CSV or Excel slate, cached on the file contents"""
+    if file_name.lower().endswith('.xlsx'):
+        return parse_csv(pd.read_excel(io.BytesIO(file_bytes)))
+    
+    # The C engine pads short rows (e.g. a missing trailing ownership cell)
+    # with nulls, where the pyarrow engine rejects the whole file
+    return parse_csv(pd.read_csv(io.BytesIO(file_bytes), dtype_backend='pyarrow'))
 
 def filter_players(df, min_projection=20.0, min_value=4.0, max_salary=12000):
-    """Filter player pool"""
-    filtered = df[
-        (df['proj_pts'] >= min_projection) & 
-        (df['value'] >= min_value) & 
-        (df['salary'] <= max_salary)
-    ].copy()
+    """Filter player pool, sorted by value"""
+    projections = df['proj_pts'].to_numpy()
+    values = df['value'].to_numpy()
+    salaries = df['salary'].to_numpy()
+    
+    # numexpr evaluates the whole predicate in one pass without temporaries
+    if ne is not None:
+        mask = ne.evaluate(
+            '(projections >= min_projection) & (values >= min_value) & (salaries <= max_salary)'
+        )
+    else:
+        mask = (projections >= min_projection) & (values >= min_value) & (salaries <= max_salary)
+    idx = np.flatnonzero(mask)
+    idx = idx[np.argsort(-values[idx], kind='stable')]
+    
+    return df.take(idx)
+
+def prune_dominated(df, slot_counts=ROSTER_SLOTS):
+    """Drop players who are dominated at their position
+    
+    A player is dominated by anyone with the same position who costs no more
+    and projects at least as many points. Players are only dropped once they
+    are dominated by more players than their positions have roster slots.
+    """
+    dominated = np.zeros(len(df), dtype=bool)
+    
+    for position, rows in df.groupby('position', sort=False, observed=True).indices.items():
+        keep = max(1, sum(slot_counts.get(pos, 0) for pos in str(position).split('/')))
+        if len(rows) <= keep:
+            continue
+        
+        # Walk from highest projection down; earlier players dominate later
+        # ones whose salary is at least as high
+        group = df.iloc[rows]
+        order = np.lexsort((group['salary'].to_numpy(), -group['proj_pts'].to_numpy()))
+        sal = group['salary'].to_numpy()[order]
+        beats = np.triu(sal[:, None] <= sal[None, :], k=1)
+        dominated[rows[order]] = beats.sum(axis=0) >= keep
+    
+    return df[~dominated]
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def apply_filters(slate_key, _slate_bytes, min_projection, min_value, max_salary):
+    """Filter and prune a slate stored by set_slate
     
-    return filtered.sort_values('value', ascending=False)
+    Cached on the slate's fingerprint rather than its bytes (which are left
+    unhashed), so a repeat call costs a dict lookup instead of hashing the
+    whole slate. Returns the number of players that passed the filters and
+    the pruned pool.
+    """
+    filtered = filter_players(from_arrow_bytes(_slate_bytes), min_projection, min_value, max_salary)
+    return len(filtered), prune_dominated(filtered)
 
+def arrow_frame(df):
+    """Return df with Arrow-backed dtypes, which st.dataframe sends without converting"""
+    return df.convert_dtypes(dtype_backend='pyarrow')
+
+def player_records(df):
+    """Convert player rows to plain dicts for display and export"""
+    return pd.DataFrame({
+        'name': df['name'],
+        'position': df['position'],
+        'salary': df['salary'].astype(int),
+        # Rounded so float32 columns don't export as e.g. 49.349998474
+        'proj_pts': df['proj_pts'].astype(float).round(4),
+        'value': df['value'].astype(float).round(4),
+        'team': df.get('team', pd.Series('', index=df.index)),
+    }).to_dict('records')
+
+def player_slots(positions):
+    """Return the ROSTER_SLOTS each position can fill, e.g. 'PG/SG' -> ('PG', 'SG')
+    
+    Returns None when any position has no recognised slot, in which case
+    lineups ignore positions altogether.
+    """
+    slots_of = {
+        pos: tuple(dict.fromkeys(p for p in str(pos).split('/') if p in ROSTER_SLOTS))
+        for pos in pd.unique(positions)
+    }
+    slots = [slots_of[pos] for pos in positions]
+    return slots if all(slots) else None
+
+def can_seat(slot_sets, slot_counts=ROSTER_SLOTS):
+    """Whether players with these eligible slots can each be given their own roster slot"""
+    if not slot_sets:
+        return True
+    
+    for slot in slot_sets[0]:
+        if slot_counts[slot] > 0 and can_seat(slot_sets[1:], {**slot_counts, slot: slot_counts[slot] - 1}):
+            return True
+    
+    return False
+
+@st.cache_data(show_spinner=False)
 def generate_cores(df, num_cores=4, players_per_core=4):
     """Generate core stacks"""
-    cores = []
-    used_players = set()
+    # Each player can only appear in one core; cores are filled in turn from
+    # the pool sorted by value
+    order = np.argsort(-df['value'].to_numpy(), kind='stable')
     
-    df_sorted = df.sort_values('value', ascending=False)
+    # Keep each name's first (best-value) row, using the integer name codes
+    codes = df['name'].astype('category').cat.codes.to_numpy()[order]
+    candidates = order[np.sort(np.unique(codes, return_index=True)[1])]
     
-    for i in range(num_cores):
+    # Skip players whose positions can no longer be seated alongside the core
+    # so far (e.g. a second C), since no lineup could hold that core
+    slots = player_slots(df['position'].to_numpy()[candidates])
+    taken = np.zeros(len(candidates), dtype=bool)
+    picks = []
+    for _ in range(num_cores):
         core = []
+        for i in np.flatnonzero(~taken):
+            if slots is None or can_seat([slots[j] for j in core] + [slots[i]]):
+                core.append(i)
+                if len(core) == players_per_core:
+                    break
         
-        for _, player in df_sorted.iterrows():
-            if player['name'] not in used_players and len(core) < players_per_core:
-                core.append({
-                    'name': player['name'],
-                    'position': player['position'],
-                    'salary': int(player['salary']),
-                    'proj_pts': float(player['proj_pts']),
-                    'value': float(player['value']),
-                    'team': player.get('team', '')
-                })
-                used_players.add(player['name'])
-        
-        if len(core) == players_per_core:
-            cores.append(core)
+        if len(core) < players_per_core:
+            break
+        taken[core] = True
+        picks.append(candidates[core])
+    
+    # (num_cores, players_per_core) matrix of row positions, one core per row
+    core_idx = np.array(picks, dtype=np.int32).reshape(len(picks), players_per_core)
+    
+    total_salary = df['salary'].to_numpy()[core_idx].sum(axis=1)
+    total_proj = df['proj_pts'].to_numpy(dtype=np.float64)[core_idx].sum(axis=1)
+    avg_value = df['value'].to_numpy(dtype=np.float64)[core_idx].mean(axis=1)
+    
+    records = player_records(df.take(core_idx.ravel()))
     
-    return cores
+    return [{
+        'players': records[i * players_per_core:(i + 1) * players_per_core],
+        'total_salary': salary,
+        'total_proj': proj,
+        'avg_value': value
+    } for i, (salary, proj, value) in enumerate(zip(
+        total_salary.tolist(), total_proj.round(4).tolist(), avg_value.round(4).tolist()
+    ))]
 
-def generate_lineups_from_cores(df, cores, lineups_per_core=5, salary_cap=60000):
-    """Generate lineups from core stacks"""
-    all_lineups = []
+def greedy_fill(salaries, core_mask, core_salary, salary_cap, need, min_salary=0):
+    """Pick up to `need` non-core players, in array order, that fit under the cap"""
+    picked = []
+    total_salary = core_salary
     
-    for core_idx, core in enumerate(cores, 1):
-        core_names = {p['name'] for p in core}
-        core_salary = sum(p['salary'] for p in core)
-        
-        # Get available players (not in core)
-        available = df[~df['name'].isin(core_names)].sort_values('value', ascending=False)
+    for i in range(len(salaries)):
+        # Stop once the lineup is full or not even the cheapest player fits
+        if len(picked) >= need or total_salary + min_salary > salary_cap:
+            break
         
-        for lineup_num in range(lineups_per_core):
-            lineup = core.copy()
-            current_salary = core_salary
-            used_in_lineup = core_names.copy()
+        if not core_mask[i] and total_salary + salaries[i] <= salary_cap:
+            picked.append(i)
+            total_salary += salaries[i]
+    
+    return np.array(picked, dtype=np.int32), int(total_salary)
+
+def lp_solver():
+    """Return the ILP solver to use: HiGHS if installed, else PuLP's bundled CBC"""
+    if pulp is None:
+        return None
+    
+    for solver in (pulp.HiGHS_CMD(msg=False), pulp.PULP_CBC_CMD(msg=False, warmStart=True)):
+        if solver.available():
+            return solver
+    
+    return None
+
+def build_lineup_model(salaries, projections, eligible, salary_cap):
+    """Build the lineup ILP for a player pool
+    
+    eligible lists the ROSTER_SLOTS each player can fill; when given, every
+    slot must be filled by an eligible player. The model is built once and
+    reused for every core by solve_lineups. Returns (problem, x variables).
+    """
+    prob = pulp.LpProblem('lineup', pulp.LpMaximize)
+    x = [pulp.LpVariable(f'x{i}', cat='Binary') for i in range(len(salaries))]
+    
+    prob += pulp.lpSum(float(p) * xi for p, xi in zip(projections, x))
+    prob += pulp.lpSum(int(s) * xi for s, xi in zip(salaries, x)) <= salary_cap
+    prob += pulp.lpSum(x) == LINEUP_SIZE
+    
+    # Assign each selected player to exactly one slot they are eligible for
+    if eligible is not None:
+        in_slot = {slot: [] for slot in ROSTER_SLOTS}
+        for i, slots in enumerate(eligible):
+            y = [pulp.LpVariable(f'y{i}_{slot}', cat='Binary') for slot in slots]
+            prob += pulp.lpSum(y) == x[i]
+            for slot, yi in zip(slots, y):
+                in_slot[slot].append(yi)
+        for slot, count in ROSTER_SLOTS.items():
+            prob += pulp.lpSum(in_slot[slot]) == count
+    
+    return prob, x
+
+def solve_lineups(model, core_mask, num_lineups, solver, max_overlap=LINEUP_SIZE - 1):
+    """Solve for the highest-projected lineups containing a core
+    
+    Core players are fixed in through their variable bounds. Returns a list of
+    player id arrays, where each lineup shares at most max_overlap players with
+    every earlier one. The model is left as it was found.
+    """
+    prob, x = model
+    core = np.flatnonzero(core_mask)
+    for i in core:
+        x[i].lowBound = 1
+    
+    lineups = []
+    try:
+        for n in range(num_lineups):
+            prob.solve(solver)
+            if pulp.LpStatus[prob.status] != 'Optimal':
+                break
             
+            picked = np.array([i for i, xi in enumerate(x) if xi.value() > 0.5], dtype=np.int32)
+            lineups.append(picked)
+            prob += pulp.lpSum(x[i] for i in picked) <= max_overlap, f'overlap{n}'
+    finally:
+        for i in core:
+            x[i].lowBound = 0
+        for n in range(len(lineups)):
+            del prob.constraints[f'overlap{n}']
+    
+    return lineups
+
+def build_core_lineups(arrays, salary_cap, lineups_per_core, max_overlap, solver, tasks):
+    """Build every lineup for a batch of cores, with its own copy of the ILP model"""
+    order, sorted_sal, sorted_proj, eligible, min_salary = arrays
+    model = None if solver is None else build_lineup_model(sorted_sal, sorted_proj, eligible, salary_cap)
+    
+    results = []
+    for core_rows, core_mask, core_salary in tasks:
+        lineups = []
+        
+        if model is not None:
+            for pids in solve_lineups(model, core_mask, lineups_per_core, solver, max_overlap):
+                # Core players first, then the rest in value order
+                lineups.append(np.concatenate([core_rows, order[pids[~core_mask[pids]]]]))
+        else:
             # Add remaining players to fill 9-player lineup
-            for _, player in available.iterrows():
-                if len(lineup) >= 9:
-                    break
-                
-                if player['name'] not in used_in_lineup:
-                    if current_salary + player['salary'] <= salary_cap:
-                        lineup.append({
-                            'name': player['name'],
-                            'position': player['position'],
-                            'salary': int(player['salary']),
-                            'proj_pts': float(player['proj_pts']),
-                            'value': float(player['value']),
-                            'team': player.get('team', '')
-                        })
-                        current_salary += player['salary']
-                        used_in_lineup.add(player['name'])
+            picked, _ = greedy_fill(
+                sorted_sal, core_mask, core_salary, salary_cap, LINEUP_SIZE - len(core_rows), min_salary
+            )
             
-            # Only add if we have a complete 9-player lineup
-            if len(lineup) == 9:
-                total_projection = sum(p['proj_pts'] for p in lineup)
+            # Only keep complete 9-player lineups; the greedy fill is
+            # deterministic, so every lineup for this core is the same
+            if len(core_rows) + len(picked) == LINEUP_SIZE:
+                lineups = [np.concatenate([core_rows, order[picked]])] * lineups_per_core
+        
+        results.append(lineups)
+    
+    return results
+
+@st.cache_data(show_spinner=False)
+def generate_lineups_from_cores(df, cores, lineups_per_core=5, salary_cap=60000, max_overlap=LINEUP_SIZE - 1):
+    """Generate lineups from core stacks
+    
+    Lineups are solved as an ILP when pulp is available (filling ROSTER_SLOTS
+    when every player has a recognised position), otherwise filled greedily by
+    value, ignoring positions.
+    
+    Returns a dict of parallel arrays with one entry per lineup: 'idx' is an
+    (n, 9) int32 matrix of row positions in df, plus 'core_set',
+    'total_salary', 'remaining_salary' and 'projected_points'. Use
+    lineups_to_records to turn them into player dicts.
+    """
+    salaries = df['salary'].to_numpy(np.int64)
+    projections = df['proj_pts'].to_numpy(np.float64)
+    
+    names = df['name'].astype('category')
+    codes = names.cat.codes.to_numpy()
+    
+    # Sort by value once for every core; duplicate names keep their best-value row
+    order = np.argsort(-df['value'].to_numpy(), kind='stable')
+    order = order[np.sort(np.unique(codes[order], return_index=True)[1])]
+    sorted_sal = salaries[order]
+    
+    # Players are identified by their position in the sorted arrays, looked up
+    # by name code (-1 for names not in the pool)
+    pid_of = np.full(len(names.cat.categories) + 1, -1, dtype=np.int64)
+    pid_of[codes[order]] = np.arange(len(order))
+    
+    core_sets = []
+    tasks = []
+    for core_idx, core in enumerate(cores, 1):
+        # Unknown names get code -1, which indexes the trailing -1 sentinel
+        core_pids = pid_of[names.cat.categories.get_indexer([p['name'] for p in core['players']])]
+        if (core_pids < 0).any():
+            continue
+        
+        core_mask = np.zeros(len(order), dtype=bool)
+        core_mask[core_pids] = True
+        core_rows = order[core_pids].astype(np.int32)
+        
+        core_sets.append(core_idx)
+        tasks.append((core_rows, core_mask, core['total_salary']))
+    
+    eligible = player_slots(df['position'].to_numpy()[order])
+    
+    min_salary = int(sorted_sal.min()) if len(sorted_sal) else 0
+    solver = lp_solver()
+    build = partial(
+        build_core_lineups, (order, sorted_sal, projections[order], eligible, min_salary),
+        salary_cap, lineups_per_core, max_overlap, solver
+    )
+    
+    # ILP cores are independent and each solve runs in an external solver
+    # process, so batches of cores are solved from threads (leaving one CPU
+    # free for the app itself). The greedy fill is one short scan per core,
+    # cheaper than starting a pool
+    workers = max(1, min(len(tasks), (os.cpu_count() or 1) - 1))
+    if solver is not None and workers > 1:
+        # One contiguous batch of cores per worker, so each worker builds its
+        # own ILP model once
+        size = -(-len(tasks) // workers)
+        batches = [tasks[i:i + size] for i in range(0, len(tasks), size)]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = [lineups for batch in executor.map(build, batches) for lineups in batch]
+    else:
+        results = build(tasks)
+    
+    rows = [idx for core_lineups in results for idx in core_lineups]
+    lineups_idx = np.array(rows, dtype=np.int32).reshape(len(rows), LINEUP_SIZE)
+    total_salary = salaries[lineups_idx].sum(axis=1)
+    
+    return {
+        'idx': lineups_idx,
+        'core_set': np.repeat(core_sets, [len(core_lineups) for core_lineups in results]).astype(np.int16),
+        'total_salary': total_salary,
+        'remaining_salary': salary_cap - total_salary,
+        'projected_points': projections[lineups_idx].sum(axis=1)
+    }
+
+def lineups_to_records(df, lineups):
+    """Expand the lineup arrays into one dict per lineup, with player dicts"""
+    # Convert every lineup's rows in one pass, then split them back up
+    records = player_records(df.take(lineups['idx'].ravel()))
+    
+    return [
+        {
+            'core_set': core_set,
+            'lineup': records[i * LINEUP_SIZE:(i + 1) * LINEUP_SIZE],
+            'total_salary': total_salary,
+            'remaining_salary': remaining_salary,
+            'projected_points': projected_points
+        }
+        for i, (core_set, total_salary, remaining_salary, projected_points) in enumerate(zip(
+            lineups['core_set'].tolist(), lineups['total_salary'].tolist(),
+            lineups['remaining_salary'].tolist(), lineups['projected_points'].tolist()
+        ))
+    ]
+
+def lineups_export_frame(df, lineups):
+    """Build the CSV export table, one row per lineup player, from the lineup arrays"""
+    players = df.take(lineups['idx'].ravel())
+    
+    return pd.DataFrame({
+        'Lineup': np.repeat(np.arange(1, len(lineups['idx']) + 1), LINEUP_SIZE),
+        'Player': players['name'].to_numpy(),
+        'Position': players['position'].to_numpy(),
+        'Team': players['team'].to_numpy() if 'team' in players.columns else '',
+        'Salary': players['salary'].to_numpy(),
+        'Projection': players['proj_pts'].astype(float).round(4).to_numpy(),
+        'Value': players['value'].astype(float).round(4).to_numpy()
+    })
+
+@st.fragment
+def show_filtered_players():
+    """Paged table of the filtered player pool"""
+    filtered = st.session_state['pool_table']
+    num_pages = max(1, -(-len(filtered) // PLAYERS_PER_PAGE))
+    
+    st.subheader("Filtered Players")
+    page = st.number_input("Page", min_value=1, max_value=num_pages, step=1, key='player_page')
+    start = (page - 1) * PLAYERS_PER_PAGE
+    
+    st.dataframe(filtered.iloc[start:start + PLAYERS_PER_PAGE], use_container_width=True)
+    st.caption(f"Players {min(start + 1, len(filtered))}-{min(start + PLAYERS_PER_PAGE, len(filtered))} of {len(filtered)}")
+
+@st.fragment
+def show_lineups():
+    """Paged list of generated lineups with the CSV export"""
+    pool = st.session_state['player_pool']
+    lineups = st.session_state['lineups']
+    
+    st.subheader("Generated Lineups")
+    
+    num_lineups = len(lineups['idx'])
+    num_pages = max(1, -(-num_lineups // LINEUPS_PER_PAGE))
+    page = st.number_input("Page", min_value=1, max_value=num_pages, step=1, key='lineup_page')
+    start = (page - 1) * LINEUPS_PER_PAGE
+    st.caption(f"Lineups {start + 1}-{min(start + LINEUPS_PER_PAGE, num_lineups)} of {num_lineups}")
+    
+    # Only build records for the lineups on this page
+    page_lineups = {k: v[start:start + LINEUPS_PER_PAGE] for k, v in lineups.items()}
+    lineup_records = lineups_to_records(pool, page_lineups)
+    
+    for i, lineup in enumerate(lineup_records, start + 1):
+        under_cap = lineup['remaining_salary'] >= 0
+        
+        with st.expander(
+            f"Lineup {i} (Core {lineup['core_set']}) - "
+            f"${lineup['total_salary']:,} | {lineup['projected_points']:.1f} pts | "
+            f"{'✅' if under_cap else '❌'} ${lineup['remaining_salary']:,} remaining",
+            expanded=False
+        ):
+            for idx, p in enumerate(lineup['lineup']):
+                is_core = idx < 4
+                col1, col2, col3, col4, col5 = st.columns([3, 1, 1, 1, 1])
                 
-                all_lineups.append({
-                    'core_set': core_idx,
-                    'lineup': lineup,
-                    'total_salary': int(current_salary),
-                    'remaining_salary': int(salary_cap - current_salary),
-                    'projected_points': float(total_projection),
-                    'num_players': len(lineup)
-                })
+                with col1:
+                    st.write(f"**{p['name']}** ({p['position']}) {'🌟' if is_core else ''}")
+                with col2:
+                    st.write(p.get('team', ''))
+                with col3:
+                    st.write(f"${p['salary']:,}")
+                with col4:
+                    st.write(f"{p['proj_pts']:.1f} pts")
+                with col5:
+                    st.write(f"{p['value']:.2f}")
     
-    return all_lineups
+    # Export button
+    st.markdown("---")
+    if st.button("📥 Export Lineups to CSV"):
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f"nba_lineups_{timestamp}.csv"
+        
+        st.download_button(
+            label="Download CSV",
+            data=st.session_state['lineups_csv'],
+            file_name=filename,
+            mime='text/csv',
+        )
+        st.success("✅ Ready to download!")
 
 # Title
 st.title("🏀 NBA DFS Lineup Optimizer")
@@ -143,15 +599,16 @@ st.sidebar.header("📊 Settings")
 num_cores = st.sidebar.number_input("Number of Core Stacks", min_value=1, max_value=10, value=4)
 lineups_per_core = st.sidebar.number_input("Lineups Per Core", min_value=1, max_value=20, value=5)
 salary_cap = st.sidebar.number_input("Salary Cap", min_value=40000, max_value=70000, value=60000, step=100)
+max_overlap = st.sidebar.number_input("Max Players Shared Between Lineups", min_value=5, max_value=LINEUP_SIZE - 1, value=LINEUP_SIZE - 1)
 
 st.sidebar.markdown("---")
-st.sidebar.info("Upload a CSV file with player data to get started")
+st.sidebar.info("Upload a CSV or Excel file with player data to get started")
 
 # Status indicators
 col1, col2, col3, col4 = st.columns(4)
 with col1:
     if st.session_state['slate_data'] is not None:
-        st.success(f"✅ Slate: {len(st.session_state['slate_data'])} players")
+        st.success(f"✅ Slate: {slate_size()} players")
     else:
         st.error("❌ No slate loaded")
 
@@ -168,8 +625,8 @@ with col3:
         st.error("❌ No cores")
 
 with col4:
-    if st.session_state['lineups']:
-        st.success(f"✅ Lineups: {len(st.session_state['lineups'])}")
+    if st.session_state['lineups'] is not None:
+        st.success(f"✅ Lineups: {len(st.session_state['lineups']['idx'])}")
     else:
         st.error("❌ No lineups")
 
@@ -179,26 +636,26 @@ tab1, tab2, tab3, tab4 = st.tabs(["📤 Upload Data", "🔍 Filter Players", "
 with tab1:
     st.header("Upload Slate File")
     
-    uploaded_file = st.file_uploader("Choose a CSV file", type=['csv'])
+    uploaded_file = st.file_uploader("Choose a CSV or Excel file", type=['csv', 'xlsx'])
     
     if uploaded_file:
         try:
-            raw_df = pd.read_csv(uploaded_file)
-            parsed_df = parse_csv(raw_df)
-            
-            st.session_state['slate_data'] = parsed_df
+            # Only parse when a different file is uploaded; other reruns reuse
+            # the slate already in session state without hashing the file
+            if uploaded_file.file_id != st.session_state['slate_file_id']:
+                set_slate(load_and_parse(uploaded_file.getvalue(), uploaded_file.name))
+                st.session_state['slate_file_id'] = uploaded_file.file_id
             
-            st.success(f"✅ Successfully loaded {len(parsed_df)} players")
+            st.success(f"✅ Successfully loaded {slate_size()} players")
             
             # Show preview
             st.subheader("Data Preview (Top 15 by Value)")
-            display_df = parsed_df.nlargest(15, 'value')[['name', 'position', 'team', 'salary', 'proj_pts', 'value']]
-            st.dataframe(display_df, use_container_width=True)
+            st.dataframe(st.session_state['slate_preview'], use_container_width=True)
                     
         except Exception as e:
             st.error(f"Error loading file: {str(e)}")
     else:
-        st.info("👆 Upload a CSV file to begin")
+        st.info("👆 Upload a CSV or Excel file to begin")
 
 with tab2:
     st.header("Filter Player Pool")
@@ -206,8 +663,6 @@ with tab2:
     if st.session_state['slate_data'] is None:
         st.warning("⚠️ Please upload a slate file first")
     else:
-        df = st.session_state['slate_data']
-        
         col1, col2, col3 = st.columns(3)
         
         with col1:
@@ -238,15 +693,25 @@ with tab2:
             )
         
         if st.button("Apply Filters", type="primary"):
-            filtered = filter_players(df, min_projection, min_value, max_salary)
+            num_filtered, filtered = apply_filters(
+                st.session_state['slate_key'], st.session_state['slate_data'],
+                min_projection, min_value, max_salary
+            )
             st.session_state['player_pool'] = filtered
+            # Converted for display once here; the pager only slices it
+            st.session_state['pool_table'] = arrow_frame(
+                filtered[['name', 'position', 'team', 'salary', 'proj_pts', 'value']]
+            )
+            st.session_state['core_stacks'] = []
+            st.session_state['lineups'] = None
+            st.session_state['lineups_csv'] = None
+            st.session_state['player_page'] = 1
             
-            st.success(f"✅ Filtered to {len(filtered)} players")
-            
-            # Show filtered results
-            st.subheader("Filtered Players (Top 30)")
-            display_df = filtered.head(30)[['name', 'position', 'team', 'salary', 'proj_pts', 'value']]
-            st.dataframe(display_df, use_container_width=True)
+            st.success(f"✅ Filtered to {len(filtered)} players ({num_filtered - len(filtered)} dominated players removed)")
+        
+        # Paging through the table only reruns this fragment
+        if st.session_state['player_pool'] is not None:
+            show_filtered_players()
 
 with tab3:
     st.header("Generate Core Stacks")
@@ -271,12 +736,12 @@ with tab3:
             st.subheader("Core Stacks")
             
             for i, core in enumerate(st.session_state['core_stacks'], 1):
-                total_sal = sum(p['salary'] for p in core)
-                total_proj = sum(p['proj_pts'] for p in core)
-                avg_value = sum(p['value'] for p in core) / len(core)
-                
-                with st.expander(f"Core Stack {i} - ${total_sal:,} | {total_proj:.1f} pts | Avg Value: {avg_value:.2f}", expanded=True):
-                    for p in core:
+                with st.expander(
+                    f"Core Stack {i} - ${core['total_salary']:,} | {core['total_proj']:.1f} pts | "
+                    f"Avg Value: {core['avg_value']:.2f}",
+                    expanded=True
+                ):
+                    for p in core['players']:
                         col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
                         with col1:
                             st.write(f"**{p['name']}** ({p['position']})")
@@ -293,80 +758,40 @@ with tab4:
     if not st.session_state['core_stacks']:
         st.warning("⚠️ Please generate core stacks first")
     else:
+        pool = st.session_state['player_pool']
+        
         if st.button("Generate All Lineups", type="primary"):
-            lineups = generate_lineups_from_cores(
-                st.session_state['player_pool'],
-                st.session_state['core_stacks'],
-                lineups_per_core=lineups_per_core,
-                salary_cap=salary_cap
-            )
-            st.session_state['lineups'] = lineups
+            # Each ILP lineup is a separate solver run, so a large batch takes a while
+            with st.spinner("Solving lineups..."):
+                lineups = generate_lineups_from_cores(
+                    pool,
+                    st.session_state['core_stacks'],
+                    lineups_per_core=lineups_per_core,
+                    salary_cap=salary_cap,
+                    max_overlap=max_overlap
+                )
             
-            if lineups:
-                avg_proj = sum(lu['projected_points'] for lu in lineups) / len(lineups)
-                st.success(f"✅ Generated {len(lineups)} lineups!")
-                st.info(f"Average Projection: {avg_proj:.1f} pts")
+            if len(lineups['idx']):
+                st.session_state['lineups'] = lineups
+                st.session_state['lineup_page'] = 1
+                st.session_state['lineups_csv'] = lineups_export_frame(pool, lineups).to_csv(index=False).encode('utf-8')
+                avg_proj = float(lineups['projected_points'].mean())
+                avg_sal = float(lineups['total_salary'].mean())
+                st.success(f"✅ Generated {len(lineups['idx'])} lineups!")
+                st.info(f"Average Projection: {avg_proj:.1f} pts | Average Salary: ${avg_sal:,.0f}")
+                
+                # Cores that no valid lineup could hold (e.g. over the cap) get none
+                empty_cores = sorted(set(range(1, len(st.session_state['core_stacks']) + 1)) - set(lineups['core_set'].tolist()))
+                if empty_cores:
+                    st.warning(f"⚠️ No valid lineups for core stack(s) {', '.join(map(str, empty_cores))}")
             else:
+                st.session_state['lineups'] = None
+                st.session_state['lineups_csv'] = None
                 st.error("❌ Could not generate any valid lineups. Try loosening filters or increasing salary cap.")
         
-        # Display lineups if they exist
-        if st.session_state['lineups']:
-            st.subheader("Generated Lineups")
-            
-            for i, lineup in enumerate(st.session_state['lineups'], 1):
-                under_cap = lineup['remaining_salary'] >= 0
-                
-                with st.expander(
-                    f"Lineup {i} (Core {lineup['core_set']}) - "
-                    f"${lineup['total_salary']:,} | {lineup['projected_points']:.1f} pts | "
-                    f"{'✅' if under_cap else '❌'} ${lineup['remaining_salary']:,} remaining",
-                    expanded=False
-                ):
-                    for idx, p in enumerate(lineup['lineup']):
-                        is_core = idx < 4
-                        col1, col2, col3, col4, col5 = st.columns([3, 1, 1, 1, 1])
-                        
-                        with col1:
-                            st.write(f"**{p['name']}** ({p['position']}) {'🌟' if is_core else ''}")
-                        with col2:
-                            st.write(p.get('team', ''))
-                        with col3:
-                            st.write(f"${p['salary']:,}")
-                        with col4:
-                            st.write(f"{p['proj_pts']:.1f} pts")
-                        with col5:
-                            st.write(f"{p['value']:.2f}")
-            
-            # Export button
-            st.markdown("---")
-            if st.button("📥 Export Lineups to CSV"):
-                # Create CSV
-                rows = []
-                for i, lineup in enumerate(st.session_state['lineups'], 1):
-                    for p in lineup['lineup']:
-                        rows.append({
-                            'Lineup': i,
-                            'Player': p['name'],
-                            'Position': p['position'],
-                            'Team': p.get('team', ''),
-                            'Salary': p['salary'],
-                            'Projection': p['proj_pts'],
-                            'Value': p['value']
-                        })
-                
-                export_df = pd.DataFrame(rows)
-                csv = export_df.to_csv(index=False)
-                
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f"nba_lineups_{timestamp}.csv"
-                
-                st.download_button(
-                    label="Download CSV",
-                    data=csv,
-                    file_name=filename,
-                    mime='text/csv',
-                )
-                st.success("✅ Ready to download!")
+        # Paging and exporting only rerun this fragment
+        if st.session_state['lineups'] is not None:
+            show_lineups()
 
 # Footer
 st.markdown("---")